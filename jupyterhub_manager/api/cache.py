@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import functools
+import time
+from typing import Any, Dict, Tuple
+from starlette.responses import StreamingResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..settings import get_settings
+
+MAX_ENTRIES = 1024
+_READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_entries: Dict[Tuple[Any, ...], Tuple[float, Any]] = {}
+# Bumped by clear(); a result is only stored if no clear happened while it was computed
+_epoch = 0
+
+
+def cached(func):
+    """Cache a read-only endpoint's result for ``settings.read_cache_ttl`` seconds.
+
+    Entries are keyed on the endpoint name and its path/query parameters
+    (the injected ``client``/``request`` are ignored). Streaming responses are never cached.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        ttl = get_settings().read_cache_ttl
+        if ttl <= 0:
+            return await func(*args, **kwargs)
+
+        key = (func.__name__, *sorted((k, v) for k, v in kwargs.items() if k not in ("client", "request")))
+        now = time.monotonic()
+        entry = _entries.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        epoch = _epoch
+        result = await func(*args, **kwargs)
+        if isinstance(result, StreamingResponse) or epoch != _epoch:
+            return result
+        if len(_entries) >= MAX_ENTRIES:
+            _entries.pop(next(iter(_entries)))
+        _entries[key] = (now + ttl, result)
+        return result
+
+    return wrapper
+
+
+def clear():
+    """Drop all cached responses, including any still being computed"""
+    global _epoch
+    _epoch += 1
+    _entries.clear()
+
+
+class InvalidateOnWriteMiddleware:
+    """Drop cached reads after any write request has been handled.
+
+    Clears when the write's response starts (so a client reacting to it
+    never sees a stale read) and again once the request is done, which also
+    covers writes that fail without sending a response.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] in _READ_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_clear(message: Message):
+            if message["type"] == "http.response.start":
+                clear()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_clear)
+        finally:
+            clear()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import hashlib
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+
+class ETagMiddleware:
+    """Add a strong ETag to buffered GET responses and answer 304 on If-None-Match.
+
+    The tag is a blake2b digest of the serialized body. Streaming responses
+    (no Content-Length) and non-200 responses pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start: Message = {}
+        body = bytearray()
+        passthrough = False
+
+        async def send_with_etag(message: Message):
+            nonlocal passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                if message["status"] != 200 or "content-length" not in Headers(raw=message["headers"]):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start.update(message, headers=list(message["headers"]))
+                return
+
+            body.extend(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            headers = MutableHeaders(scope=start)
+            headers["etag"] = etag
+            if if_none_match and _matches(if_none_match, etag):
+                del headers["content-length"]
+                start["status"] = 304
+                await send(start)
+                await send({"type": "http.response.body", "body": b""})
+            else:
+                await send(start)
+                await send({"type": "http.response.body", "body": bytes(body)})
+
+        await self.app(scope, receive, send_with_etag)
@@ -1,61 +1,131 @@
 from __future__ import annotations
 
-from fastapi import FastAPI, Depends, HTTPException, status
+import httpx
+import inspect
+import re
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional, List
-from ..settings import settings
-from ..client.base import HubClient
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from typing import Any, Optional, List
+from ..settings import get_settings
+from ..client.base import HubClient, run_batched
+from . import cache
+from .etag import ETagMiddleware
 from ..models import (
     UserModel, CreateUserRequest, ServerModel, GroupModel, 
     CreateGroupRequest, TokenModel, CreateTokenRequest, HealthModel
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share one HubClient (and its connection pool) across all requests"""
+    app.state.hub_client = HubClient()
+    try:
+        yield
+    finally:
+        await app.state.hub_client.close()
+
+
 app = FastAPI(
     title="JupyterHub Manager API", 
     version="0.1.0",
     description="Professional API for managing JupyterHub instances",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Same-origin deployments (e.g. behind the UI's reverse proxy) skip the CORS layer entirely
+if get_settings().enable_cors:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=get_settings().cors_allow_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+app.add_middleware(ETagMiddleware)
+# Any write may change hub state, so drop cached reads afterwards
+app.add_middleware(cache.InvalidateOnWriteMiddleware)
 
 
-async def get_client():
-    client = HubClient()
-    try:
-        yield client
-    finally:
-        await client.close()
+STREAM_CHUNK_SIZE = 65536
+
+
+async def get_client(request: Request) -> HubClient:
+    """The shared HubClient; async so FastAPI resolves it without a threadpool hop"""
+    return request.app.state.hub_client
+
+
+def hub_payload(data: Any) -> Any:
+    """Pass hub data through as-is, skipping response_model re-validation unless enabled"""
+    if get_settings().validate_responses:
+        return data
+    return ORJSONResponse(data)
+
+
+def bulk_error(name: str, exc: Exception) -> dict:
+    """Per-item error entry for bulk endpoints, carrying the hub's status code when there is one"""
+    status_code = exc.response.status_code if isinstance(exc, httpx.HTTPStatusError) else 500
+    return {"name": name, "error": str(exc), "status_code": status_code}
+
+
+async def hub_stream(client: HubClient, path: str) -> StreamingResponse:
+    """Pipe a hub list response straight through without buffering it.
+
+    The hub response is closed as a background task, which Starlette runs even
+    when the client disconnects before the body is iterated.
+    """
+    resp = await client.stream_get(path)
+    return StreamingResponse(
+        resp.aiter_bytes(STREAM_CHUNK_SIZE),
+        media_type="application/json",
+        background=BackgroundTask(resp.aclose),
+    )
 
 
 # Health & Info endpoints
 @app.get("/health", tags=["system"], response_model=HealthModel)
+@cache.cached
 async def health(client: HubClient = Depends(get_client)):
     """Get JupyterHub health status"""
     return await client.get_health()
 
 
-@app.get("/info", tags=["system"])
-async def hub_info(client: HubClient = Depends(get_client)):
-    """Get JupyterHub information"""
-    return await client.get_info()
-
-
 # User management endpoints
 @app.get("/users", tags=["users"], response_model=List[UserModel])
+@cache.cached
 async def list_users(client: HubClient = Depends(get_client)):
     """List all users"""
-    return await client.list_users()
+    if get_settings().stream_list_responses:
+        return await hub_stream(client, "/users")
+    return hub_payload(await client.list_users())
+
+
+@app.get("/users/servers:bulk", tags=["servers"])
+async def list_all_user_servers(
+    names: Optional[List[str]] = Query(None), client: HubClient = Depends(get_client)
+):
+    """List servers for several users at once (all users when no names given).
+
+    Users the hub can't return (e.g. unknown names) get an error entry and
+    turn the response into a 207 Multi-Status; the other users are unaffected.
+    """
+    servers = await client.list_all_user_servers(names, return_exceptions=True)
+    failed = False
+    for name, result in servers.items():
+        if isinstance(result, Exception):
+            servers[name] = bulk_error(name, result)
+            failed = True
+    return ORJSONResponse(servers, status_code=207 if failed else 200)
 
 
 @app.get("/users/{username}", tags=["users"], response_model=UserModel)
+@cache.cached
 async def get_user(username: str, client: HubClient = Depends(get_client)):
     """Get specific user details"""
     try:
@@ -70,6 +140,26 @@ async def create_user(user_data: CreateUserRequest, client: HubClient = Depends(
     return await client.create_user(user_data.name, user_data.admin)
 
 
+@app.post("/users:bulk_create", tags=["users"], status_code=201)
+async def bulk_create_users(users: List[CreateUserRequest], client: HubClient = Depends(get_client)):
+    """Create many users, in batches of ``bulk_batch_size`` concurrent requests.
+
+    Returns one entry per requested user, in order: the created user, or an
+    error entry. Any failure turns the response into a 207 Multi-Status.
+    """
+    results = await run_batched(
+        (client.create_user(u.name, u.admin) for u in users),
+        get_settings().bulk_batch_size,
+        return_exceptions=True,
+    )
+    failed = False
+    for i, (user, result) in enumerate(zip(users, results)):
+        if isinstance(result, Exception):
+            results[i] = bulk_error(user.name, result)
+            failed = True
+    return ORJSONResponse(results, status_code=207 if failed else 201)
+
+
 @app.delete("/users/{username}", tags=["users"], status_code=204)
 async def delete_user(username: str, client: HubClient = Depends(get_client)):
     """Delete a user"""
@@ -83,42 +173,14 @@ async def modify_user(username: str, admin: Optional[bool] = None, client: HubCl
     return await client.modify_user(username, admin=admin)
 
 
-# Server management endpoints
-@app.get("/users/{username}/servers", tags=["servers"])
-async def list_user_servers(username: str, client: HubClient = Depends(get_client)):
-    """List user's servers"""
-    return await client.list_servers(username)
-
-
-@app.get("/users/{username}/servers/{server_name}", tags=["servers"], response_model=ServerModel)
-async def get_server(username: str, server_name: str = "", client: HubClient = Depends(get_client)):
-    """Get specific server details"""
-    return await client.get_server(username, server_name)
-
-
-@app.post("/users/{username}/servers/{server_name}", tags=["servers"], status_code=201)
-async def start_server(username: str, server_name: str = "", client: HubClient = Depends(get_client)):
-    """Start a server for user"""
-    return await client.start_server(username, server_name)
-
-
-@app.delete("/users/{username}/servers/{server_name}", tags=["servers"], status_code=202)
-async def stop_server(username: str, server_name: str = "", client: HubClient = Depends(get_client)):
-    """Stop a server for user"""
-    return await client.stop_server(username, server_name)
-
-
 # Group management endpoints
 @app.get("/groups", tags=["groups"], response_model=List[GroupModel])
+@cache.cached
 async def list_groups(client: HubClient = Depends(get_client)):
     """List all groups"""
-    return await client.list_groups()
-
-
-@app.get("/groups/{group_name}", tags=["groups"], response_model=GroupModel)
-async def get_group(group_name: str, client: HubClient = Depends(get_client)):
-    """Get specific group details"""
-    return await client.get_group(group_name)
+    if get_settings().stream_list_responses:
+        return await hub_stream(client, "/groups")
+    return hub_payload(await client.list_groups())
 
 
 @app.post("/groups", tags=["groups"], status_code=201, response_model=GroupModel)
@@ -140,6 +202,19 @@ async def add_user_to_group(group_name: str, username: str, client: HubClient =
     return await client.add_user_to_group(group_name, username)
 
 
+@app.post("/groups/{group_name}/users:bulk", tags=["groups"])
+async def add_users_to_group(group_name: str, usernames: List[str], client: HubClient = Depends(get_client)):
+    """Add several users to a group in one hub request"""
+    return await client.add_users_to_group(group_name, usernames)
+
+
+@app.delete("/groups/{group_name}/users:bulk", tags=["groups"], status_code=204)
+async def remove_users_from_group(group_name: str, usernames: List[str], client: HubClient = Depends(get_client)):
+    """Remove several users from a group in one hub request"""
+    await client.remove_users_from_group(group_name, usernames)
+    return {"status": "removed"}
+
+
 @app.delete("/groups/{group_name}/users/{username}", tags=["groups"], status_code=204)
 async def remove_user_from_group(group_name: str, username: str, client: HubClient = Depends(get_client)):
     """Remove user from group"""
@@ -147,24 +222,13 @@ async def remove_user_from_group(group_name: str, username: str, client: HubClie
     return {"status": "removed"}
 
 
-# Service endpoints
-@app.get("/services", tags=["services"])
-async def list_services(client: HubClient = Depends(get_client)):
-    """List all services"""
-    return await client.list_services()
-
-
-@app.get("/services/{service_name}", tags=["services"])
-async def get_service(service_name: str, client: HubClient = Depends(get_client)):
-    """Get specific service details"""
-    return await client.get_service(service_name)
-
-
 # Token management endpoints
 @app.get("/tokens", tags=["tokens"], response_model=List[TokenModel])
 async def list_tokens(client: HubClient = Depends(get_client)):
     """List all tokens (admin only)"""
-    return await client.list_tokens()
+    if get_settings().stream_list_responses:
+        return await hub_stream(client, "/tokens")
+    return hub_payload(await client.list_tokens())
 
 
 @app.post("/users/{username}/tokens", tags=["tokens"], status_code=201, response_model=TokenModel)
@@ -180,20 +244,86 @@ async def delete_token(username: str, token_id: str, client: HubClient = Depends
     return {"status": "deleted"}
 
 
-# Admin endpoints
-@app.post("/admin/shutdown", tags=["admin"])
-async def shutdown_hub(client: HubClient = Depends(get_client)):
-    """Shutdown the hub (admin only)"""
-    return await client.shutdown_hub()
-
-
-@app.get("/admin/proxy", tags=["admin"])
-async def get_proxy_info(client: HubClient = Depends(get_client)):
-    """Get proxy information"""
-    return await client.get_proxy()
-
-
-@app.post("/admin/cull", tags=["admin"])
-async def cull_servers(client: HubClient = Depends(get_client)):
-    """Cull idle servers"""
-    return await client.cull_servers()
+# Pass-through endpoints ----------------------------------------------------
+# Routes that map one-to-one onto a HubClient method, called with the path
+# parameters in order: (method, path, endpoint name, client method, tag,
+# status code, response model, cached, summary)
+PASSTHROUGH_ROUTES = [
+    ("GET", "/info", "hub_info", "get_info", "system", 200, None, True,
+     "Get JupyterHub information"),
+    ("GET", "/users/{username}/servers", "list_user_servers", "list_servers", "servers", 200, None, False,
+     "List user's servers"),
+    ("GET", "/users/{username}/servers/{server_name}", "get_server", "get_server", "servers", 200, ServerModel, False,
+     "Get specific server details"),
+    ("POST", "/users/{username}/servers/{server_name}", "start_server", "start_server", "servers", 201, None, False,
+     "Start a server for user"),
+    ("DELETE", "/users/{username}/servers/{server_name}", "stop_server", "stop_server", "servers", 202, None, False,
+     "Stop a server for user"),
+    ("GET", "/groups/{group_name}", "get_group", "get_group", "groups", 200, GroupModel, False,
+     "Get specific group details"),
+    ("GET", "/services", "list_services", "list_services", "services", 200, None, True,
+     "List all services"),
+    ("GET", "/services/{service_name}", "get_service", "get_service", "services", 200, None, False,
+     "Get specific service details"),
+    ("POST", "/admin/shutdown", "shutdown_hub", "shutdown_hub", "admin", 200, None, False,
+     "Shutdown the hub (admin only)"),
+    ("GET", "/admin/proxy", "get_proxy_info", "get_proxy", "admin", 200, None, False,
+     "Get proxy information"),
+    ("POST", "/admin/cull", "cull_servers", "cull_servers", "admin", 200, None, False,
+     "Cull idle servers"),
+]
+
+_PATH_PARAM = re.compile(r"{(\w+)}")
+
+
+def _passthrough(name: str, client_method: str, params: List[str]):
+    """Build an endpoint that forwards its path parameters to ``HubClient.<client_method>``.
+
+    The signature is set explicitly so FastAPI sees the path parameters, and the
+    client comes from the same ``get_client`` dependency as the hand-written
+    routes (so ``app.dependency_overrides[get_client]`` applies here too).
+    """
+
+    async def endpoint(client: HubClient, **path_params):
+        return await getattr(client, client_method)(*(path_params[p] for p in params))
+
+    endpoint.__name__ = name
+    setattr(endpoint, "__signature__", inspect.Signature(
+        [inspect.Parameter(
+            "client", inspect.Parameter.KEYWORD_ONLY, annotation=HubClient, default=Depends(get_client)
+        )]
+        + [inspect.Parameter(p, inspect.Parameter.KEYWORD_ONLY, annotation=str) for p in params]
+    ))
+    return endpoint
+
+
+for method, path, name, client_method, tag, status_code, model, cached, summary in PASSTHROUGH_ROUTES:
+    endpoint = _passthrough(name, client_method, _PATH_PARAM.findall(path))
+    app.add_api_route(
+        path,
+        cache.cached(endpoint) if cached else endpoint,
+        methods=[method],
+        name=name,
+        tags=[tag],
+        status_code=status_code,
+        response_model=model,
+        summary=summary,
+    )
+
+
+def run():
+    """Serve the API with uvloop + httptools (uvicorn falls back to asyncio/h11 where unavailable)"""
+    import uvicorn
+
+    settings = get_settings()
+    uvicorn.run(
+        app,
+        host=settings.api_host,
+        port=settings.api_port,
+        loop="auto" if settings.use_uvloop else "asyncio",
+        http="auto",
+    )
+
+
+if __name__ == "__main__":
+    run()
@@ -1,8 +1,52 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import itertools
+import socket
+import time
 import httpx
-from typing import Any, Dict, Optional, List
-from ..settings import settings
+import orjson
+from typing import Any, Awaitable, Dict, Iterable, Optional, List, Tuple
+from ..settings import get_settings
+
+_USER_PATH = "/users/{}"
+_SERVER_PATH = "/users/{}/servers/{}"
+_GROUP_USERS_PATH = "/groups/{}/users"
+_AUTH_HDR_TMPL = "token {}"
+_GET_CACHE_MAX = 1024
+# Small JSON requests should not wait on Nagle; keep pooled sockets alive between bursts
+_SOCKET_OPTIONS = [
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+
+
+@functools.lru_cache(maxsize=4096)
+def _user_path(name: str) -> str:
+    """User paths are rebuilt constantly for the same few names; reuse the strings"""
+    return _USER_PATH.format(name)
+
+
+def _json(resp: httpx.Response) -> Any:
+    """Parse the raw body bytes; orjson detects UTF-8 itself, no str decode needed"""
+    return orjson.loads(resp.content)
+
+
+async def run_batched(
+    coros: Iterable[Awaitable[Any]], batch_size: int = 32, return_exceptions: bool = False
+) -> List[Any]:
+    """Await coroutines in batches of ``batch_size``, starting each batch once the previous finished.
+
+    Keeps bulk operations from flooding the connection pool and the hub.
+    Results are returned in input order; with ``return_exceptions`` a failing
+    item's exception takes its place instead of aborting the remaining batches.
+    """
+    results: List[Any] = []
+    pending = iter(coros)
+    while batch := list(itertools.islice(pending, batch_size)):
+        results.extend(await asyncio.gather(*batch, return_exceptions=return_exceptions))
+    return results
 
 
 class HubClient:
@@ -11,40 +55,143 @@ class HubClient:
     Wraps a single persistent httpx.AsyncClient with auth headers.
     """
 
-    def __init__(self, base_url: Optional[str] = None, api_token: Optional[str] = None, verify: Optional[bool] = None):
-        self._base_url = (base_url or str(settings.jupyterhub_url)).rstrip("/")
+    __slots__ = (
+        "_base_url", "_api_token", "_verify", "_default_headers", "_client",
+        "_cache_ttl", "_cache", "_inflight", "_generation",
+    )
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_token: Optional[str] = None,
+        verify: Optional[bool] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        settings = get_settings()
+        self._base_url = base_url.rstrip("/") if base_url else settings._base_url_str
         self._api_token = api_token or settings.api_token
         self._verify = settings.verify_ssl if verify is None else verify
+        # Encoded once; requests below never pass their own headers so httpx reuses these
+        self._default_headers = httpx.Headers(
+            {"Authorization": _AUTH_HDR_TMPL.format(self._api_token), "Accept": "application/json"}
+        )
+        # A caller-supplied transport (e.g. httpx.MockTransport in tests) replaces the pooled one
+        transport = transport or httpx.AsyncHTTPTransport(
+            verify=self._verify,
+            http2=settings.enable_http2,
+            limits=httpx.Limits(
+                max_connections=settings.httpx_max_connections,
+                max_keepalive_connections=settings.httpx_max_keepalive,
+                keepalive_expiry=settings.httpx_keepalive_expiry,
+            ),
+            retries=1,
+            socket_options=_SOCKET_OPTIONS,
+        )
         self._client = httpx.AsyncClient(
             base_url=self._base_url + "/hub/api",
-            headers={"Authorization": f"token {self._api_token}"},
+            headers=self._default_headers,
             timeout=settings.request_timeout,
             verify=self._verify,
+            transport=transport,
         )
+        # Short-lived GET cache; concurrent identical GETs share one in-flight request
+        self._cache_ttl = settings.hub_get_cache_ttl
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Bumped after every write; GETs that started before it never populate the cache
+        self._generation = 0
 
     async def close(self):
         await self._client.aclose()
 
     # Generic HTTP helpers -------------------------------------------------
     async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
-        resp = await self._client.request(method, path, **kwargs)
+        try:
+            resp = await self._client.request(method, path, **kwargs)
+        finally:
+            if method != "GET":
+                self._invalidate()
         resp.raise_for_status()
         return resp
 
-    async def get(self, path: str, **kwargs) -> Any:
-        return (await self._request("GET", path, **kwargs)).json()
+    def _invalidate(self):
+        """Forget cached and in-flight GETs once a write has finished (or failed)"""
+        self._generation += 1
+        self._cache.clear()
+        self._inflight.clear()
+
+    async def get(self, path: str, ttl: Optional[float] = None, **kwargs) -> Any:
+        """GET a path, served from the micro-cache when fresh (``ttl`` seconds, 0 disables).
+
+        Requests with extra httpx arguments always go to the hub.
+        """
+        ttl = self._cache_ttl if ttl is None else ttl
+        if kwargs or ttl <= 0:
+            return _json(await self._request("GET", path, **kwargs))
+
+        entry = self._cache.get(path)
+        if entry is not None and time.monotonic() - entry[0] < ttl:
+            return entry[1]
+
+        task = self._inflight.get(path)
+        if task is None:
+            task = asyncio.ensure_future(self._get_and_cache(path))
+            self._inflight[path] = task
+            task.add_done_callback(functools.partial(self._forget_inflight, path))
+        return await asyncio.shield(task)
+
+    def _forget_inflight(self, path: str, task: asyncio.Task):
+        if self._inflight.get(path) is task:
+            del self._inflight[path]
+        # Mark a failure as retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _get_and_cache(self, path: str) -> Any:
+        generation = self._generation
+        data = _json(await self._request("GET", path))
+        if generation == self._generation:
+            if len(self._cache) >= _GET_CACHE_MAX:
+                self._cache.clear()
+            self._cache[path] = (time.monotonic(), data)
+        return data
 
     async def post(self, path: str, json: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
-        return (await self._request("POST", path, json=json, **kwargs)).json()
+        return _json(await self._request("POST", path, json=json, **kwargs))
 
     async def delete(self, path: str, **kwargs) -> Any:
         resp = await self._request("DELETE", path, **kwargs)
         if resp.content:
-            return resp.json()
+            return _json(resp)
         return {"status": "deleted"}
 
     async def patch(self, path: str, json: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
-        return (await self._request("PATCH", path, json=json, **kwargs)).json()
+        return _json(await self._request("PATCH", path, json=json, **kwargs))
+
+    async def stream_get(self, path: str) -> httpx.Response:
+        """GET a path and return the response with its body still unread.
+
+        The status is checked before returning, so errors raise here instead of
+        mid-stream. The caller owns the response and must ``aclose()`` it, even
+        if it never reads the body, or the pooled connection is not released.
+        """
+        resp = await self._client.send(self._client.build_request("GET", path), stream=True)
+        try:
+            resp.raise_for_status()
+        except httpx.HTTPStatusError:
+            await resp.aclose()
+            raise
+        return resp
+
+    async def _gather_bounded(self, coros, return_exceptions: bool = False) -> List[Any]:
+        """Run coroutines concurrently, capped at the connection pool size"""
+        sem = asyncio.Semaphore(get_settings().httpx_max_connections)
+
+        async def run(coro):
+            async with sem:
+                return await coro
+
+        return await asyncio.gather(*(run(c) for c in coros), return_exceptions=return_exceptions)
 
     # High-level endpoints (comprehensive) ---------------------------------------
     
@@ -56,6 +203,13 @@ class HubClient:
         except httpx.HTTPStatusError as e:
             return {"status": "error", "detail": str(e)}
 
+    async def get_health_fast(self, timeout: float = 2.0):
+        """Uncached health probe with a short timeout; timeouts propagate to the caller"""
+        try:
+            return await self.get("/health", timeout=timeout)
+        except httpx.HTTPStatusError as e:
+            return {"status": "error", "detail": str(e)}
+
     async def get_info(self):
         """Get hub info including version"""
         return await self.get("/info")
@@ -67,7 +221,11 @@ class HubClient:
 
     async def get_user(self, name: str):
         """Get specific user details"""
-        return await self.get(f"/users/{name}")
+        return await self.get(_user_path(name))
+
+    async def get_users_bulk(self, names: List[str]) -> List[Dict[str, Any]]:
+        """Get several users' details concurrently"""
+        return await self._gather_bounded(self.get_user(n) for n in names)
 
     async def create_user(self, name: str, admin: bool = False):
         """Create a new user"""
@@ -75,33 +233,48 @@ class HubClient:
 
     async def delete_user(self, name: str):
         """Delete a user"""
-        return await self.delete(f"/users/{name}")
+        return await self.delete(_user_path(name))
 
     async def modify_user(self, name: str, admin: Optional[bool] = None):
         """Modify user properties"""
         data = {}
         if admin is not None:
             data["admin"] = admin
-        return await self.patch(f"/users/{name}", json=data)
+        return await self.patch(_user_path(name), json=data)
 
     # Servers
     async def list_servers(self, user: str):
         """List user's servers"""
-        user_data = await self.get(f"/users/{user}")
+        user_data = await self.get(_user_path(user))
         return user_data.get("servers", {})
 
+    async def list_all_user_servers(
+        self, users: Optional[List[str]] = None, return_exceptions: bool = False
+    ) -> Dict[str, Any]:
+        """List servers for several users concurrently (all users when omitted).
+
+        With ``return_exceptions`` a failed lookup (e.g. an unknown user) maps
+        that user to the exception instead of failing the whole call.
+        """
+        if users is None:
+            return {u["name"]: u.get("servers", {}) for u in await self.list_users()}
+        servers = await self._gather_bounded(
+            (self.list_servers(u) for u in users), return_exceptions=return_exceptions
+        )
+        return dict(zip(users, servers))
+
     async def get_server(self, user: str, server_name: str = ""):
         """Get specific server details"""
-        return await self.get(f"/users/{user}/servers/{server_name}")
+        return await self.get(_SERVER_PATH.format(user, server_name))
 
     async def start_server(self, user: str, server_name: str = "", options: Optional[Dict[str, Any]] = None):
         """Start a server for user"""
         json_data = options or {}
-        return await self.post(f"/users/{user}/servers/{server_name}", json=json_data)
+        return await self.post(_SERVER_PATH.format(user, server_name), json=json_data)
 
     async def stop_server(self, user: str, server_name: str = ""):
         """Stop a server for user"""
-        return await self.delete(f"/users/{user}/servers/{server_name}")
+        return await self.delete(_SERVER_PATH.format(user, server_name))
 
     # Groups
     async def list_groups(self):
@@ -123,13 +296,21 @@ class HubClient:
         """Delete a group"""
         return await self.delete(f"/groups/{name}")
 
+    async def add_users_to_group(self, group_name: str, usernames: List[str]):
+        """Add several users to a group in one request"""
+        return await self.post(_GROUP_USERS_PATH.format(group_name), json={"users": usernames})
+
     async def add_user_to_group(self, group_name: str, username: str):
         """Add user to group"""
-        return await self.post(f"/groups/{group_name}/users", json={"users": [username]})
+        return await self.add_users_to_group(group_name, [username])
+
+    async def remove_users_from_group(self, group_name: str, usernames: List[str]):
+        """Remove several users from a group in one request"""
+        return await self.delete(_GROUP_USERS_PATH.format(group_name), json={"users": usernames})
 
     async def remove_user_from_group(self, group_name: str, username: str):
         """Remove user from group"""
-        return await self.delete(f"/groups/{group_name}/users/{username}")
+        return await self.remove_users_from_group(group_name, [username])
 
     # Services
     async def list_services(self):
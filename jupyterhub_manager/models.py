@@ -7,12 +7,12 @@ class UserModel(BaseModel):
     """User model from JupyterHub API"""
     name: str
     admin: bool = False
-    groups: List[str] = []
+    groups: List[str] = Field(default_factory=list)
     server: Optional[str] = None
     pending: Optional[str] = None
     created: Optional[datetime] = None
     last_activity: Optional[datetime] = None
-    servers: Dict[str, Any] = {}
+    servers: Dict[str, Any] = Field(default_factory=dict)
 
 
 class ServerModel(BaseModel):
@@ -24,15 +24,15 @@ class ServerModel(BaseModel):
     progress_url: Optional[str] = None
     started: Optional[datetime] = None
     last_activity: Optional[datetime] = None
-    state: Dict[str, Any] = {}
-    user_options: Dict[str, Any] = {}
+    state: Dict[str, Any] = Field(default_factory=dict)
+    user_options: Dict[str, Any] = Field(default_factory=dict)
 
 
 class GroupModel(BaseModel):
     """Group model from JupyterHub API"""
     name: str
-    users: List[str] = []
-    properties: Dict[str, Any] = {}
+    users: List[str] = Field(default_factory=list)
+    properties: Dict[str, Any] = Field(default_factory=dict)
 
 
 class ServiceModel(BaseModel):
@@ -51,8 +51,8 @@ class TokenModel(BaseModel):
     id: Optional[str] = None
     user: Optional[str] = None
     service: Optional[str] = None
-    roles: List[str] = []
-    scopes: List[str] = []
+    roles: List[str] = Field(default_factory=list)
+    scopes: List[str] = Field(default_factory=list)
     note: Optional[str] = None
     created: Optional[datetime] = None
     last_activity: Optional[datetime] = None
@@ -75,15 +75,15 @@ class CreateUserRequest(BaseModel):
 class CreateGroupRequest(BaseModel):
     """Request model for creating a group"""
     name: str = Field(..., description="Group name")
-    users: List[str] = Field([], description="Initial users in group")
+    users: List[str] = Field(default_factory=list, description="Initial users in group")
 
 
 class CreateTokenRequest(BaseModel):
     """Request model for creating an API token"""
     note: Optional[str] = Field(None, description="Note about the token")
     expires_in: Optional[int] = Field(None, description="Token expiration in seconds")
-    roles: List[str] = Field([], description="Roles for the token")
-    scopes: List[str] = Field([], description="Scopes for the token")
+    roles: List[str] = Field(default_factory=list, description="Roles for the token")
+    scopes: List[str] = Field(default_factory=list, description="Scopes for the token")
 
 
 class ServerOptions(BaseModel):
@@ -91,4 +91,4 @@ class ServerOptions(BaseModel):
     image: Optional[str] = None
     cpu_limit: Optional[float] = None
     mem_limit: Optional[str] = None
-    env: Dict[str, str] = {}
+    env: Dict[str, str] = Field(default_factory=dict)
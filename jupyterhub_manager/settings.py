@@ -1,23 +1,45 @@
-from pydantic import BaseSettings, AnyHttpUrl, Field
-from typing import Optional
+from functools import cached_property, lru_cache
+from pydantic import AnyHttpUrl, Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="JUPYTERHUB_MANAGER_", case_sensitive=False)
+
     jupyterhub_url: AnyHttpUrl = Field(..., description="Base URL of JupyterHub, e.g. https://hub.example.com")
     api_token: str = Field(..., description="Admin API token for JupyterHub")
     verify_ssl: bool = True
     request_timeout: int = 30
+    hub_get_cache_ttl: float = 2.0
+
+    # httpx connection pool
+    enable_http2: bool = True
+    httpx_max_connections: int = 1000
+    httpx_max_keepalive: int = 100
+    httpx_keepalive_expiry: float = 15.0
+    bulk_batch_size: int = 32
 
     # FastAPI server config
     api_host: str = "0.0.0.0"
     api_port: int = 8080
+    use_uvloop: bool = True
+    enable_cors: bool = False
+    cors_allow_origins: List[str] = Field(default_factory=lambda: ["*"])
+    read_cache_ttl: float = 5.0
+    validate_responses: bool = False
+    stream_list_responses: bool = False
 
     # Streamlit
     streamlit_port: int = 8501
 
-    class Config:
-        env_prefix = "JUPYTERHUB_MANAGER_"
-        case_sensitive = False
+    @cached_property
+    def _base_url_str(self) -> str:
+        """Hub base URL as a plain string, without trailing slash"""
+        return str(self.jupyterhub_url).rstrip("/")
 
 
-settings = Settings()  # type: ignore[arg-type]
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Settings are read from the environment once per process"""
+    return Settings()  # type: ignore[call-arg]
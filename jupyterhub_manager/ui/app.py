@@ -1,9 +1,17 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import asyncio
-import pandas as pd
-from datetime import datetime
+import json
+import threading
+import time
+import httpx
 from ..client.base import HubClient
 
+try:
+    import uvloop  # get_loop() builds its loop with it; the process-wide policy is left alone
+except ImportError:  # not available on Windows
+    uvloop = None  # type: ignore[assignment]
+
 st.set_page_config(
     page_title="JupyterHub Manager", 
     layout="wide",
@@ -13,16 +21,32 @@ st.set_page_config(
 st.title("🚀 JupyterHub Manager")
 st.markdown("Professional admin interface for JupyterHub management")
 
-# Initialize session state
+# Initialize session state; None means "not loaded yet", unlike an empty list
 if 'users' not in st.session_state:
-    st.session_state.users = []
+    st.session_state.users = None
 if 'groups' not in st.session_state:
-    st.session_state.groups = []
+    st.session_state.groups = None
 if 'services' not in st.session_state:
-    st.session_state.services = []
+    st.session_state.services = None
+
+@st.cache_resource
+def get_loop():
+    """One long-lived event loop, running in a background thread.
+
+    Reusing it across reruns (and sessions) keeps the cached HubClient's
+    connection pool alive instead of tearing it down with every asyncio.run.
+    """
+    loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="hub-client-loop", daemon=True).start()
+    return loop
+
+def run(coro):
+    """Run a coroutine on the shared loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
 
 @st.cache_resource
 def get_client():
+    """Process-wide HubClient; never closed between reruns so its keep-alive pool is reused"""
     return HubClient()
 
 client = get_client()
@@ -34,74 +58,234 @@ page = st.sidebar.selectbox("Choose a page", [
 ])
 
 # Helper functions
-async def fetch_users():
+# Hub reads are memoized for a few seconds so reruns don't refetch; failures
+# raise out of the cached functions and are therefore never cached.
+@st.cache_data(ttl=5, show_spinner=False)
+def _cached_list_users():
+    return run(client.list_users())
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _cached_list_groups():
+    return run(client.list_groups())
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _cached_list_services():
+    return run(client.list_services())
+
+def invalidate():
+    """Any write may change hub state, so drop the cached hub reads (derived
+    frames are keyed on their input and stay valid)"""
+    _cached_list_users.clear()
+    _cached_list_groups.clear()
+    _cached_list_services.clear()
+    _cached_dashboard_data.clear()
+
+BULK_CONCURRENCY = 16
+
+async def _bulk(action, targets):
+    sem = asyncio.Semaphore(BULK_CONCURRENCY)
+    
+    async def one(args):
+        async with sem:
+            return await action(*args)
+    
+    return await asyncio.gather(*(one(t) for t in targets), return_exceptions=True)
+
+def bulk(action, targets):
+    """Call a HubClient action once per argument tuple, concurrently (at most
+    BULK_CONCURRENCY in flight). Returns {target: exception} for the failures."""
+    results = run(_bulk(action, targets))
+    invalidate()
+    return {t: r for t, r in zip(targets, results) if isinstance(r, Exception)}
+
+def report(failures, message):
+    if not failures:
+        st.success(message)
+    for target, e in failures.items():
+        st.error(f"Error ({target[0]}): {e}")
+
+class RateLimited(Exception):
+    """The hub answered 429 recently; hub reads are skipped until it is due again"""
+
+def backoff(read, *args):
+    """Call a cached hub read. After a 429 the read is skipped (RateLimited is
+    raised, without blocking the rerun) for min(2**retry, 30) seconds."""
+    remaining = st.session_state.get("hub_retry_after", 0) - time.monotonic()
+    if remaining > 0:
+        raise RateLimited(f"Hub is rate limiting requests; retrying in {remaining:.0f}s")
     try:
-        return await client.list_users()
+        result = read(*args)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 429:
+            retry = st.session_state.get("hub_retry", 0) + 1
+            st.session_state.hub_retry = retry
+            st.session_state.hub_retry_after = time.monotonic() + min(2 ** retry, 30)
+        raise
+    st.session_state.hub_retry = 0
+    return result
+
+def fetch_users():
+    try:
+        return backoff(_cached_list_users)
+    except RateLimited as e:
+        # Last snapshot; stays None (not yet loaded) if there is none
+        st.warning(str(e))
+        return st.session_state.users
     except Exception as e:
         st.error(f"Error fetching users: {e}")
         return []
 
-async def fetch_groups():
+def fetch_groups():
     try:
-        return await client.list_groups()
+        return backoff(_cached_list_groups)
+    except RateLimited as e:
+        st.warning(str(e))
+        return st.session_state.groups
     except Exception as e:
         st.error(f"Error fetching groups: {e}")
         return []
 
-async def fetch_services():
+def fetch_services():
     try:
-        return await client.list_services()
+        return backoff(_cached_list_services)
+    except RateLimited as e:
+        st.warning(str(e))
+        return st.session_state.services
     except Exception as e:
         st.error(f"Error fetching services: {e}")
         return []
 
-async def fetch_health():
+HEALTH_BREAKER_SECONDS = 10
+
+async def fetch_health(probe=True):
+    if not probe:
+        return {"status": "error", "detail": "Hub timed out recently; probe paused"}
     try:
-        return await client.get_health()
+        return await client.get_health_fast()
+    except httpx.TimeoutException as e:
+        return {"status": "timeout", "detail": str(e)}
     except Exception as e:
         return {"status": "error", "detail": str(e)}
 
+async def dashboard_data(probe_health=True):
+    # Independent requests: overlap them instead of paying one round-trip each
+    return await asyncio.gather(fetch_health(probe_health), client.list_users(), return_exceptions=True)
+
+USERS_PAGE_SIZE = 25
+
+@st.cache_data(show_spinner=False)
+def users_frame(users):
+    """Tabular view of the user list, built once per distinct list"""
+    import pandas as pd
+    
+    df = pd.DataFrame(users, columns=["name", "admin", "servers", "last_activity"])
+    df["admin"] = df["admin"].fillna(False).astype(bool)
+    df["running"] = [bool(u.get("servers")) for u in users]
+    # Lowercased once here so the per-keystroke search filter is a plain substring scan
+    df["_name_lc"] = df["name"].str.lower()
+    return df
+
+@st.cache_data(show_spinner=False)
+def activity_series(users):
+    """Users active per day; value_counts avoids resample's empty-bin blowup on outliers"""
+    import pandas as pd
+    
+    last_activity = users_frame(users)["last_activity"]
+    days = pd.to_datetime(
+        last_activity, format="ISO8601", cache=True, errors="coerce", utc=True
+    ).dropna().dt.floor("D")
+    return days.value_counts().sort_index()
+
+@st.cache_data(show_spinner=False)
+def _format_group_rows(groups_json):
+    """(name, member summary) per group, keyed on the serialized group list"""
+    rows = []
+    for group in json.loads(groups_json):
+        members = group.get("users", [])
+        more = "..." if len(members) > 3 else ""
+        rows.append((group["name"], f"👥 {len(members)} members: {', '.join(members[:3])}{more}"))
+    return rows
+
+@st.cache_data(ttl=10, show_spinner=False)
+def tokens_frame(tokens):
+    """Token metadata as an Arrow-backed frame, which st.dataframe serializes without a copy"""
+    import pandas as pd
+    
+    return pd.DataFrame.from_records(tokens).convert_dtypes(dtype_backend="pyarrow")
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _cached_dashboard_data(probe_health):
+    health, users = run(dashboard_data(probe_health))
+    if isinstance(users, Exception):
+        raise users
+    return health, users
+
+# Records whether the browser tab is visible in a ?visible= query param, read on the next rerun
+VISIBILITY_JS = """<script>
+const doc = window.parent.document;
+function sync() {
+  const url = new URL(window.parent.location);
+  url.searchParams.set("visible", doc.hidden ? "0" : "1");
+  window.parent.history.replaceState(null, "", url);
+}
+doc.addEventListener("visibilitychange", sync);
+sync();
+</script>"""
+
+def tab_visible():
+    return st.experimental_get_query_params().get("visible", ["1"])[0] != "0"
+
 # Dashboard page
 if page == "Dashboard":
     st.header("📊 Dashboard")
+    components.html(VISIBILITY_JS, height=0)
+    
+    # A hidden tab keeps showing the last snapshot instead of polling the hub
+    if tab_visible() or "dashboard" not in st.session_state:
+        try:
+            # Circuit breaker: after a health timeout, skip the probe for a while
+            probe = time.monotonic() >= st.session_state.get("health_bad_until", 0)
+            st.session_state.dashboard = backoff(_cached_dashboard_data, probe)
+            if st.session_state.dashboard[0].get("status") == "timeout":
+                st.session_state["health_bad_until"] = time.monotonic() + HEALTH_BREAKER_SECONDS
+        except RateLimited as e:
+            st.warning(str(e))
+        except Exception as e:
+            st.error(f"Error fetching users: {e}")
+            st.session_state.pop("dashboard", None)
+    health, users = st.session_state.get("dashboard", ({"status": "error"}, []))
     
     col1, col2, col3, col4 = st.columns(4)
     
     # Health status
     with col1:
-        health = asyncio.run(fetch_health())
         status = health.get("status", "unknown")
         if status == "ok":
             st.success("🟢 Hub Status: Healthy")
         else:
             st.error(f"🔴 Hub Status: {status}")
     
-    # Quick stats
+    # Quick stats, both counts from one column-wise sum over the cached frame
+    users_df = users_frame(users)
+    n_running, n_admin = users_df[["running", "admin"]].sum()
+    
     with col2:
-        users = asyncio.run(fetch_users())
-        st.metric("Total Users", len(users))
+        st.metric("Total Users", len(users_df))
     
     with col3:
-        active_servers = sum(1 for u in users if u.get("servers"))
-        st.metric("Active Servers", active_servers)
+        st.metric("Active Servers", int(n_running))
     
     with col4:
-        admin_users = sum(1 for u in users if u.get("admin"))
-        st.metric("Admin Users", admin_users)
+        st.metric("Admin Users", int(n_admin))
     
     # Recent activity chart
     st.subheader("Recent Activity")
     if users:
-        df = pd.DataFrame(users)
-        if 'last_activity' in df.columns:
-            df['last_activity'] = pd.to_datetime(df['last_activity'], errors='coerce')
-            df = df.dropna(subset=['last_activity'])
-            if not df.empty:
-                st.line_chart(df.set_index('last_activity').resample('D').size())
-            else:
-                st.info("No recent activity data available")
+        activity = activity_series(users)
+        if not activity.empty:
+            st.line_chart(activity)
         else:
-            st.info("Activity data not available")
+            st.info("No recent activity data available")
 
 # Users page
 elif page == "Users":
@@ -111,7 +295,8 @@ elif page == "Users":
     
     with col2:
         if st.button("🔄 Refresh Users"):
-            st.session_state.users = asyncio.run(fetch_users())
+            invalidate()
+            st.session_state.users = fetch_users()
             st.success("Users refreshed!")
     
     with col1:
@@ -125,57 +310,60 @@ elif page == "Users":
             
             if st.form_submit_button("Create User"):
                 try:
-                    result = asyncio.run(client.create_user(new_username, is_admin))
+                    result = run(client.create_user(new_username, is_admin))
+                    invalidate()
                     st.success(f"✅ Created user: {new_username}")
-                    st.session_state.users = asyncio.run(fetch_users())
+                    st.session_state.users = fetch_users()
                 except Exception as e:
                     st.error(f"❌ Error creating user: {e}")
     
     # Display users
-    users = st.session_state.users or asyncio.run(fetch_users())
+    if st.session_state.users is None:
+        st.session_state.users = fetch_users()
+    users = st.session_state.users or []
+    df = users_frame(users)
     
     if search_term:
-        users = [u for u in users if search_term.lower() in u.get("name", "").lower()]
+        df = df[df["_name_lc"].str.contains(search_term.lower(), regex=False, na=False)]
     
-    if users:
-        for user in users:
-            with st.container():
-                col1, col2, col3, col4, col5 = st.columns([2, 1, 1, 1, 1])
-                
-                with col1:
-                    admin_badge = "👑" if user.get("admin") else "👤"
-                    st.write(f"{admin_badge} **{user.get('name')}**")
-                
-                with col2:
-                    server_status = "🟢 Running" if user.get("servers") else "⚪ Stopped"
-                    st.write(server_status)
-                
-                with col3:
-                    if st.button("▶️ Start", key=f"start_{user['name']}"):
-                        try:
-                            asyncio.run(client.start_server(user["name"]))
-                            st.success("Server starting...")
-                        except Exception as e:
-                            st.error(f"Error: {e}")
-                
-                with col4:
-                    if st.button("⏹️ Stop", key=f"stop_{user['name']}"):
-                        try:
-                            asyncio.run(client.stop_server(user["name"]))
-                            st.success("Server stopping...")
-                        except Exception as e:
-                            st.error(f"Error: {e}")
-                
-                with col5:
-                    if st.button("🗑️ Delete", key=f"delete_{user['name']}"):
-                        try:
-                            asyncio.run(client.delete_user(user["name"]))
-                            st.success("User deleted!")
-                            st.session_state.users = asyncio.run(fetch_users())
-                        except Exception as e:
-                            st.error(f"Error: {e}")
-                
-                st.divider()
+    if not df.empty:
+        # Only the current page is rendered
+        page_count = -(-len(df) // USERS_PAGE_SIZE)
+        page_no = int(st.number_input("Page", min_value=1, max_value=page_count, value=1)) if page_count > 1 else 1
+        window = df.iloc[(page_no - 1) * USERS_PAGE_SIZE : page_no * USERS_PAGE_SIZE]
+        
+        # One editable grid with a selection column; keyed per page/search so ticks don't leak across views
+        edited = st.data_editor(
+            window[["name", "admin", "running"]].assign(selected=False),
+            key=f"users_select_{page_no}_{search_term}",
+            hide_index=True,
+            use_container_width=True,
+            column_order=["selected", "name", "admin", "running"],
+            disabled=["name", "admin", "running"],
+            column_config={
+                "selected": st.column_config.CheckboxColumn("Select"),
+                "name": st.column_config.TextColumn("User"),
+                "admin": st.column_config.CheckboxColumn("👑 Admin"),
+                "running": st.column_config.CheckboxColumn("🟢 Running"),
+            },
+        )
+        
+        selected = edited.loc[edited["selected"], "name"].tolist()
+        targets = [(name,) for name in selected]
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            if st.button("▶️ Start selected", disabled=not selected):
+                report(bulk(client.start_server, targets), "Servers starting...")
+        
+        with col2:
+            if st.button("⏹️ Stop selected", disabled=not selected):
+                report(bulk(client.stop_server, targets), "Servers stopping...")
+        
+        with col3:
+            if st.button("🗑️ Delete selected", disabled=not selected):
+                report(bulk(client.delete_user, targets), "Users deleted!")
+                st.session_state.users = fetch_users()
     else:
         st.info("No users found")
 
@@ -184,7 +372,8 @@ elif page == "Groups":
     st.header("👥 Group Management")
     
     if st.button("🔄 Refresh Groups"):
-        st.session_state.groups = asyncio.run(fetch_groups())
+        invalidate()
+        st.session_state.groups = fetch_groups()
         st.success("Groups refreshed!")
     
     # Create new group
@@ -195,33 +384,36 @@ elif page == "Groups":
             
             if st.form_submit_button("Create Group"):
                 try:
-                    users_list = [u.strip() for u in initial_users.split('\n') if u.strip()]
-                    result = asyncio.run(client.create_group(group_name, users_list))
+                    users_list = list(filter(None, map(str.strip, initial_users.splitlines())))
+                    result = run(client.create_group(group_name, users_list))
+                    invalidate()
                     st.success(f"✅ Created group: {group_name}")
-                    st.session_state.groups = asyncio.run(fetch_groups())
+                    st.session_state.groups = fetch_groups()
                 except Exception as e:
                     st.error(f"❌ Error creating group: {e}")
     
     # Display groups
-    groups = st.session_state.groups or asyncio.run(fetch_groups())
+    if st.session_state.groups is None:
+        st.session_state.groups = fetch_groups()
+    groups = st.session_state.groups or []
     
-    for group in groups:
+    for name, summary in _format_group_rows(json.dumps(groups, sort_keys=True)):
         with st.container():
             col1, col2, col3 = st.columns([2, 2, 1])
             
             with col1:
-                st.write(f"**{group.get('name')}**")
+                st.write(f"**{name}**")
             
             with col2:
-                users_in_group = group.get('users', [])
-                st.write(f"👥 {len(users_in_group)} members: {', '.join(users_in_group[:3])}{'...' if len(users_in_group) > 3 else ''}")
+                st.write(summary)
             
             with col3:
-                if st.button("🗑️ Delete", key=f"delete_group_{group['name']}"):
+                if st.button("🗑️ Delete", key=f"delete_group_{name}"):
                     try:
-                        asyncio.run(client.delete_group(group["name"]))
+                        run(client.delete_group(name))
+                        invalidate()
                         st.success("Group deleted!")
-                        st.session_state.groups = asyncio.run(fetch_groups())
+                        st.session_state.groups = fetch_groups()
                     except Exception as e:
                         st.error(f"Error: {e}")
             
@@ -232,10 +424,13 @@ elif page == "Services":
     st.header("🔧 Services")
     
     if st.button("🔄 Refresh Services"):
-        st.session_state.services = asyncio.run(fetch_services())
+        invalidate()
+        st.session_state.services = fetch_services()
         st.success("Services refreshed!")
     
-    services = st.session_state.services or asyncio.run(fetch_services())
+    if st.session_state.services is None:
+        st.session_state.services = fetch_services()
+    services = st.session_state.services or []
     
     for service in services:
         with st.container():
@@ -272,14 +467,15 @@ elif page == "Admin":
         
         if st.button("🗑️ Cull Idle Servers"):
             try:
-                result = asyncio.run(client.cull_servers())
+                result = run(client.cull_servers())
+                invalidate()
                 st.success("✅ Server culling initiated")
             except Exception as e:
                 st.error(f"❌ Error: {e}")
         
         if st.button("🔄 Check Proxy"):
             try:
-                proxy_info = asyncio.run(client.get_proxy())
+                proxy_info = run(client.get_proxy())
                 st.json(proxy_info)
             except Exception as e:
                 st.error(f"❌ Error: {e}")
@@ -291,7 +487,7 @@ elif page == "Admin":
         if st.button("🛑 Shutdown JupyterHub", type="primary"):
             if st.checkbox("I understand this will shut down the hub"):
                 try:
-                    result = asyncio.run(client.shutdown_hub())
+                    result = run(client.shutdown_hub())
                     st.warning("🛑 Hub shutdown initiated!")
                 except Exception as e:
                     st.error(f"❌ Error: {e}")
@@ -312,7 +508,7 @@ elif page == "Tokens":
             if st.form_submit_button("Create Token"):
                 try:
                     expires = expires_in if expires_in > 0 else None
-                    result = asyncio.run(client.create_token(token_user, token_note, expires))
+                    result = run(client.create_token(token_user, token_note, expires))
                     st.success("✅ Token created!")
                     st.code(result.get("token", "Token not returned"), language="text")
                 except Exception as e:
@@ -321,10 +517,9 @@ elif page == "Tokens":
     # List tokens (admin only)
     if st.button("📝 List All Tokens (Admin)"):
         try:
-            tokens = asyncio.run(client.list_tokens())
+            tokens = run(client.list_tokens())
             if tokens:
-                df = pd.DataFrame(tokens)
-                st.dataframe(df)
+                st.dataframe(tokens_frame(tokens), use_container_width=True)
             else:
                 st.info("No tokens found")
         except Exception as e:
@@ -334,7 +529,16 @@ elif page == "Tokens":
 elif page == "Servers":
     st.header("🖥️ Server Management")
     
-    users = asyncio.run(fetch_users())
+    users = fetch_users() or []
+    
+    running = {
+        f"{user['name']}/{server_name}" if server_name else user["name"]: (user["name"], server_name)
+        for user in users
+        for server_name in user.get("servers", {})
+    }
+    to_stop = st.multiselect("Select servers", list(running))
+    if st.button("⏹️ Stop selected", disabled=not to_stop):
+        report(bulk(client.stop_server, [running[label] for label in to_stop]), "Servers stopping...")
     
     for user in users:
         servers = user.get("servers", {})
@@ -361,7 +565,8 @@ elif page == "Servers":
                 with col4:
                     if st.button("⏹️ Stop", key=f"stop_server_{user['name']}_{server_name}"):
                         try:
-                            asyncio.run(client.stop_server(user["name"], server_name))
+                            run(client.stop_server(user["name"], server_name))
+                            invalidate()
                             st.success("Server stopping...")
                         except Exception as e:
                             st.error(f"Error: {e}")
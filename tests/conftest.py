@@ -0,0 +1,48 @@
+import asyncio
+import os
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+os.environ.setdefault("JUPYTERHUB_MANAGER_JUPYTERHUB_URL", "https://test.hub.com")
+os.environ.setdefault("JUPYTERHUB_MANAGER_API_TOKEN", "test-token")
+
+import pytest  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from jupyterhub_manager.api import cache  # noqa: E402
+from jupyterhub_manager.api.main import app  # noqa: E402
+from jupyterhub_manager.client.base import HubClient  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """One loop for the whole run; per-test loop setup dominates these short mocked tests"""
+    loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+async def hub_client():
+    """The shared HubClient the lifespan handler would normally create"""
+    client = HubClient()
+    yield client
+    await client.close()
+
+
+@pytest.fixture(autouse=True)
+def app_state(hub_client):
+    """Reinstall the shared client and start every test with empty caches"""
+    app.state.hub_client = hub_client
+    hub_client._cache.clear()
+    cache.clear()
+    yield hub_client
+
+
+@pytest.fixture(scope="session")
+async def ac():
+    """One in-process HTTP client for the API, shared by every test"""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
@@ -1,6 +1,13 @@
+import asyncio
+import httpx
+import orjson
 import pytest
-from unittest.mock import AsyncMock, patch
-from jupyterhub_manager.client.base import HubClient
+from jupyterhub_manager.client.base import HubClient, run_batched
+
+
+def mock_hub(handler):
+    """HubClient whose requests are answered in-process by ``handler``"""
+    return HubClient(transport=httpx.MockTransport(handler))
 
 
 @pytest.mark.asyncio
@@ -19,117 +26,297 @@ async def test_hub_client_initialization():
     await client.close()
 
 
+@pytest.mark.asyncio
+async def test_request_headers():
+    """Test requests carry the token header and hit the hub API prefix"""
+    
+    requests = []
+    
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"version": "4.0.0"})
+    
+    client = HubClient(
+        base_url="https://test.hub.com/", api_token="secret", transport=httpx.MockTransport(handler)
+    )
+    
+    await client.get_info()
+    assert requests[0].url == "https://test.hub.com/hub/api/info"
+    assert requests[0].headers["Authorization"] == "token secret"
+    assert requests[0].headers["Accept"] == "application/json"
+    
+    await client.close()
+
+
 @pytest.mark.asyncio
 async def test_user_operations():
     """Test user-related operations"""
     
-    with patch('httpx.AsyncClient') as mock_client:
-        # Setup mock responses
-        mock_response = AsyncMock()
-        mock_response.raise_for_status = AsyncMock()
-        mock_response.json.return_value = {"name": "testuser", "admin": False}
-        
-        mock_client.return_value.request = AsyncMock(return_value=mock_response)
-        
-        client = HubClient()
-        
-        # Test create user
-        result = await client.create_user("testuser", admin=False)
-        assert result["name"] == "testuser"
-        
-        # Test get user
-        result = await client.get_user("testuser")
-        assert result["name"] == "testuser"
-        
-        await client.close()
+    client = mock_hub(lambda request: httpx.Response(200, json={"name": "testuser", "admin": False}))
+    
+    # Test create user
+    result = await client.create_user("testuser", admin=False)
+    assert result["name"] == "testuser"
+    
+    # Test get user
+    result = await client.get_user("testuser")
+    assert result["name"] == "testuser"
+    
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_bulk_user_operations():
+    """Test concurrent bulk user lookups"""
+    
+    client = mock_hub(
+        lambda request: httpx.Response(200, json={"name": "testuser", "servers": {"": {"ready": True}}})
+    )
+    
+    # Test bulk get users
+    result = await client.get_users_bulk(["alice", "bob"])
+    assert len(result) == 2
+    
+    # Test bulk list servers
+    result = await client.list_all_user_servers(["alice", "bob"])
+    assert set(result) == {"alice", "bob"}
+    assert result["alice"][""]["ready"]
+    
+    await client.close()
 
 
 @pytest.mark.asyncio
 async def test_server_operations():
     """Test server-related operations"""
     
-    with patch('httpx.AsyncClient') as mock_client:
-        mock_response = AsyncMock()
-        mock_response.raise_for_status = AsyncMock()
-        mock_response.json.return_value = {"ready": True, "url": "http://test.com"}
-        
-        mock_client.return_value.request = AsyncMock(return_value=mock_response)
-        
-        client = HubClient()
-        
-        # Test start server
-        result = await client.start_server("testuser")
-        assert "ready" in result
-        
-        # Test stop server
-        mock_response.content = b'{"status": "deleted"}'
-        result = await client.stop_server("testuser")
-        assert result["ready"]  # Based on mock
-        
-        await client.close()
+    def handler(request):
+        if request.method == "DELETE":
+            return httpx.Response(204)
+        return httpx.Response(201, json={"ready": True, "url": "http://test.com"})
+    
+    client = mock_hub(handler)
+    
+    # Test start server
+    result = await client.start_server("testuser")
+    assert "ready" in result
+    
+    # Test stop server
+    result = await client.stop_server("testuser")
+    assert result["status"] == "deleted"
+    
+    await client.close()
 
 
 @pytest.mark.asyncio
 async def test_group_operations():
     """Test group-related operations"""
     
-    with patch('httpx.AsyncClient') as mock_client:
-        mock_response = AsyncMock()
-        mock_response.raise_for_status = AsyncMock()
-        mock_response.json.return_value = {"name": "testgroup", "users": []}
-        
-        mock_client.return_value.request = AsyncMock(return_value=mock_response)
-        
-        client = HubClient()
-        
-        # Test create group
-        result = await client.create_group("testgroup", ["user1", "user2"])
-        assert result["name"] == "testgroup"
-        
-        # Test list groups
-        mock_response.json.return_value = [{"name": "group1"}, {"name": "group2"}]
-        result = await client.list_groups()
-        assert len(result) == 2
-        
-        await client.close()
+    requests = []
+    
+    def handler(request):
+        requests.append(request)
+        if request.method == "GET":
+            return httpx.Response(200, json=[{"name": "group1"}, {"name": "group2"}])
+        return httpx.Response(201, json={"name": "testgroup", "users": []})
+    
+    client = mock_hub(handler)
+    
+    # Test create group
+    result = await client.create_group("testgroup", ["user1", "user2"])
+    assert result["name"] == "testgroup"
+    
+    # Test list groups
+    result = await client.list_groups()
+    assert len(result) == 2
+    
+    # Test bulk membership update is a single request
+    calls = len(requests)
+    await client.add_users_to_group("group1", ["user1", "user2"])
+    assert len(requests) == calls + 1
+    assert requests[-1].method == "POST"
+    assert requests[-1].url.path == "/hub/api/groups/group1/users"
+    assert orjson.loads(requests[-1].content) == {"users": ["user1", "user2"]}
+    
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_group_member_removal():
+    """Test member removal is one DELETE on the group's users with a JSON body"""
+    
+    requests = []
+    
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"name": "group1", "users": []})
+    
+    client = mock_hub(handler)
+    
+    await client.remove_users_from_group("group1", ["user1", "user2"])
+    await client.remove_user_from_group("group1", "user3")
+    
+    assert len(requests) == 2
+    for request, users in zip(requests, (["user1", "user2"], ["user3"])):
+        assert request.method == "DELETE"
+        assert request.url.path == "/hub/api/groups/group1/users"
+        assert orjson.loads(request.content) == {"users": users}
+    
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_stream_get():
+    """Test streamed GETs hand back an unread response and raise on error status"""
+    
+    def handler(request):
+        if request.url.path.endswith("/missing"):
+            return httpx.Response(404)
+        return httpx.Response(200, content=b'[{"name": "alice"}]')
+    
+    client = mock_hub(handler)
+    
+    resp = await client.stream_get("/users")
+    assert b"".join([chunk async for chunk in resp.aiter_bytes()]) == b'[{"name": "alice"}]'
+    await resp.aclose()
+    
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.stream_get("/missing")
+    
+    await client.close()
 
 
 @pytest.mark.asyncio
 async def test_error_handling():
     """Test error handling in client"""
     
-    with patch('httpx.AsyncClient') as mock_client:
-        import httpx
-        
-        # Simulate HTTP error
-        mock_client.return_value.request.side_effect = httpx.HTTPStatusError(
-            "Not found", request=AsyncMock(), response=AsyncMock()
-        )
-        
-        client = HubClient()
-        
-        # Test health check with error
-        result = await client.get_health()
-        assert result["status"] == "error"
-        
-        await client.close()
+    client = mock_hub(lambda request: httpx.Response(404, json={"message": "Not found"}))
+    
+    # Test health check with error
+    result = await client.get_health()
+    assert result["status"] == "error"
+    
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_health_fast():
+    """Test the fast health probe skips the GET cache and surfaces timeouts"""
+    
+    requests = []
+    
+    def handler(request):
+        requests.append(request)
+        if len(requests) > 2:
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(200, json={"status": "ok"})
+    
+    client = mock_hub(handler)
+    
+    assert (await client.get_health_fast())["status"] == "ok"
+    assert (await client.get_health_fast())["status"] == "ok"
+    assert len(requests) == 2
+    assert requests[0].extensions["timeout"]["read"] == 2.0
+    
+    with pytest.raises(httpx.TimeoutException):
+        await client.get_health_fast()
+    
+    await client.close()
 
 
 @pytest.mark.asyncio
 async def test_token_operations():
     """Test token-related operations"""
     
-    with patch('httpx.AsyncClient') as mock_client:
-        mock_response = AsyncMock()
-        mock_response.raise_for_status = AsyncMock()
-        mock_response.json.return_value = {"token": "abc123", "user": "testuser"}
-        
-        mock_client.return_value.request = AsyncMock(return_value=mock_response)
-        
-        client = HubClient()
-        
-        # Test create token
-        result = await client.create_token("testuser", "test note", 3600)
-        assert result["token"] == "abc123"
-        
-        await client.close()
+    client = mock_hub(lambda request: httpx.Response(201, json={"token": "abc123", "user": "testuser"}))
+    
+    # Test create token
+    result = await client.create_token("testuser", "test note", 3600)
+    assert result["token"] == "abc123"
+    
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_cache():
+    """Test concurrent identical GETs collapse and writes invalidate the cache"""
+    
+    requests = []
+    
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"name": "testuser"})
+    
+    client = mock_hub(handler)
+    
+    results = await asyncio.gather(*(client.get_user("testuser") for _ in range(5)))
+    assert all(r["name"] == "testuser" for r in results)
+    assert len(requests) == 1
+    
+    # Fresh entries are served from the cache
+    await client.get_user("testuser")
+    assert len(requests) == 1
+    
+    # Writes drop cached GETs
+    await client.create_user("other")
+    await client.get_user("testuser")
+    assert len(requests) == 3
+    
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_cache_read_during_write():
+    """Test GETs overlapping a write never cache the pre-write state"""
+    
+    users = ["a", "b"]
+    delete_started = asyncio.Event()
+    release = asyncio.Event()
+    
+    async def handler(request):
+        if request.method == "DELETE":
+            delete_started.set()
+            await release.wait()
+            users.remove("b")
+            return httpx.Response(204)
+        if request.url.params.get("slow"):
+            await release.wait()
+        return httpx.Response(200, json=[{"name": u} for u in users])
+    
+    client = mock_hub(handler)
+    
+    # A read already in flight when the write starts, finishing after it
+    slow_read = asyncio.ensure_future(client.get("/users?slow=1"))
+    await asyncio.sleep(0)
+    delete = asyncio.ensure_future(client.delete_user("b"))
+    await delete_started.wait()
+    
+    # A read issued while the write is in flight
+    assert [u["name"] for u in await client.list_users()] == ["a", "b"]
+    
+    release.set()
+    await delete
+    await slow_read
+    assert [u["name"] for u in await client.list_users()] == ["a"]
+    assert [u["name"] for u in await client.get("/users?slow=1")] == ["a"]
+    
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_run_batched():
+    """Test batched execution preserves order and caps concurrency"""
+    
+    in_flight = 0
+    peak = 0
+    
+    async def work(i):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return i
+    
+    result = await run_batched((work(i) for i in range(10)), batch_size=3)
+    assert result == list(range(10))
+    assert peak == 3
@@ -1,20 +1,22 @@
 import pytest
 import asyncio
-from httpx import AsyncClient
-from unittest.mock import AsyncMock, patch
-from jupyterhub_manager.api.main import app
+import httpx
+from unittest.mock import AsyncMock, Mock
+from jupyterhub_manager.api.main import app, get_client, hub_stream
 from jupyterhub_manager.client.base import HubClient
+from jupyterhub_manager.settings import get_settings
 
 
 @pytest.fixture
-def mock_client():
+def mock_client(app_state):
     """Mock HubClient for testing"""
     client = AsyncMock(spec=HubClient)
+    app.state.hub_client = client
     return client
 
 
 @pytest.mark.asyncio
-async def test_comprehensive_user_operations(mock_client):
+async def test_comprehensive_user_operations(ac, mock_client):
     """Test comprehensive user operations"""
     
     # Mock responses
@@ -26,35 +28,187 @@ async def test_comprehensive_user_operations(mock_client):
     mock_client.create_user.return_value = {"name": "charlie", "admin": False}
     mock_client.modify_user.return_value = {"name": "alice", "admin": True}
     
-    with patch('jupyterhub_manager.api.main.get_client') as mock_get_client:
-        mock_get_client.return_value.__aenter__.return_value = mock_client
-        mock_get_client.return_value.__aexit__.return_value = None
-        
-        async with AsyncClient(app=app, base_url="http://test") as ac:
-            # Test list users
-            response = await ac.get("/users")
-            assert response.status_code == 200
-            users = response.json()
-            assert len(users) == 2
-            assert users[0]["name"] == "alice"
-            
-            # Test get user
-            response = await ac.get("/users/alice")
-            assert response.status_code == 200
-            assert response.json()["name"] == "alice"
-            
-            # Test create user
-            response = await ac.post("/users", json={"name": "charlie", "admin": False})
-            assert response.status_code == 201
-            assert response.json()["name"] == "charlie"
-            
-            # Test modify user
-            response = await ac.patch("/users/alice?admin=true")
-            assert response.status_code == 200
+    # Test list users
+    response = await ac.get("/users")
+    assert response.status_code == 200
+    users = response.json()
+    assert len(users) == 2
+    assert users[0]["name"] == "alice"
+    
+    # Test get user
+    response = await ac.get("/users/alice")
+    assert response.status_code == 200
+    assert response.json()["name"] == "alice"
+    
+    # Test create user
+    response = await ac.post("/users", json={"name": "charlie", "admin": False})
+    assert response.status_code == 201
+    assert response.json()["name"] == "charlie"
+    
+    # Test modify user
+    response = await ac.patch("/users/alice?admin=true")
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_users(ac, mock_client):
+    """Test bulk user creation"""
+    
+    mock_client.create_user.side_effect = lambda name, admin: {"name": name, "admin": admin}
+    
+    response = await ac.post(
+        "/users:bulk_create",
+        json=[{"name": "alice"}, {"name": "bob", "admin": True}, {"name": "carol"}],
+    )
+    assert response.status_code == 201
+    assert [u["name"] for u in response.json()] == ["alice", "bob", "carol"]
+    assert mock_client.create_user.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_users_partial_failure(ac, mock_client, monkeypatch):
+    """Test one failing create doesn't abort the rest of a bulk request"""
+    
+    def create_user(name, admin):
+        if name == "bob":
+            request = httpx.Request("POST", "https://test.hub.com/hub/api/users")
+            raise httpx.HTTPStatusError(
+                "409 Conflict", request=request, response=httpx.Response(409, request=request)
+            )
+        return {"name": name, "admin": admin}
+    
+    mock_client.create_user.side_effect = create_user
+    # One user per batch, so later batches must still run after bob fails
+    monkeypatch.setattr(get_settings(), "bulk_batch_size", 1)
+    
+    response = await ac.post(
+        "/users:bulk_create",
+        json=[{"name": "alice"}, {"name": "bob"}, {"name": "carol"}],
+    )
+    assert response.status_code == 207
+    alice, bob, carol = response.json()
+    assert alice == {"name": "alice", "admin": False}
+    assert bob["name"] == "bob" and bob["status_code"] == 409
+    assert carol["name"] == "carol"
+    assert mock_client.create_user.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_read_cache(ac, mock_client):
+    """Test read endpoints are cached until a write happens"""
+    
+    mock_client.list_users.return_value = [{"name": "alice"}]
+    mock_client.create_user.return_value = {"name": "bob"}
+    
+    await ac.get("/users")
+    await ac.get("/users")
+    assert mock_client.list_users.await_count == 1
+    
+    # Writes invalidate cached reads
+    await ac.post("/users", json={"name": "bob"})
+    await ac.get("/users")
+    assert mock_client.list_users.await_count == 2
 
 
 @pytest.mark.asyncio
-async def test_server_management(mock_client):
+async def test_read_cache_read_during_write(ac, mock_client):
+    """Test a read overlapping a write does not cache the pre-write result"""
+    
+    users = ["a", "b"]
+    started = asyncio.Event()
+    release = asyncio.Event()
+    
+    async def list_users():
+        snapshot = [{"name": u} for u in users]
+        started.set()
+        await release.wait()
+        return snapshot
+    
+    async def delete_user(name):
+        users.remove(name)
+    
+    mock_client.list_users.side_effect = list_users
+    mock_client.delete_user.side_effect = delete_user
+    
+    slow_read = asyncio.ensure_future(ac.get("/users"))
+    await started.wait()
+    response = await ac.delete("/users/b")
+    assert response.status_code == 204
+    
+    release.set()
+    assert [u["name"] for u in (await slow_read).json()] == ["a", "b"]
+    
+    response = await ac.get("/users")
+    assert [u["name"] for u in response.json()] == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_etag_conditional_get(ac, mock_client):
+    """Test GET responses carry an ETag and honour If-None-Match"""
+    
+    mock_client.list_groups.return_value = [{"name": "scientists", "users": []}]
+    
+    response = await ac.get("/groups")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and etag.endswith('"')
+    
+    response = await ac.get("/groups", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    
+    response = await ac.get("/groups", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_streamed_list(ac, mock_client, monkeypatch):
+    """Test list endpoints can stream hub payloads through"""
+    
+    monkeypatch.setattr(get_settings(), "stream_list_responses", True)
+    
+    async def body():
+        yield b'[{"name": '
+        yield b'"alice"}]'
+    
+    hub_response = Mock(aiter_bytes=lambda chunk_size: body(), aclose=AsyncMock())
+    mock_client.stream_get.return_value = hub_response
+    
+    response = await ac.get("/users")
+    assert response.status_code == 200
+    assert response.json() == [{"name": "alice"}]
+    mock_client.stream_get.assert_awaited_with("/users")
+    hub_response.aclose.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_streamed_list_client_disconnect(mock_client):
+    """Test the hub response is closed even if the body is never iterated"""
+    
+    iterated = False
+    
+    async def body():
+        nonlocal iterated
+        iterated = True
+        yield b"[]"
+    
+    hub_response = Mock(aiter_bytes=lambda chunk_size: body(), aclose=AsyncMock())
+    mock_client.stream_get.return_value = hub_response
+    response = await hub_stream(mock_client, "/users")
+    
+    async def receive():
+        return {"type": "http.disconnect"}
+    
+    async def stalled_send(message):
+        await asyncio.Event().wait()
+    
+    await response({"type": "http", "method": "GET"}, receive, stalled_send)
+    assert not iterated
+    hub_response.aclose.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_server_management(ac, mock_client):
     """Test server management operations"""
     
     mock_client.list_servers.return_value = {"": {"ready": True, "url": "http://example.com"}}
@@ -62,78 +216,118 @@ async def test_server_management(mock_client):
     mock_client.start_server.return_value = {"pending": "spawn"}
     mock_client.stop_server.return_value = {"status": "deleted"}
     
-    with patch('jupyterhub_manager.api.main.get_client') as mock_get_client:
-        mock_get_client.return_value.__aenter__.return_value = mock_client
-        mock_get_client.return_value.__aexit__.return_value = None
-        
-        async with AsyncClient(app=app, base_url="http://test") as ac:
-            # Test list servers
-            response = await ac.get("/users/alice/servers")
-            assert response.status_code == 200
-            
-            # Test start server
-            response = await ac.post("/users/alice/servers/")
-            assert response.status_code == 201
-            
-            # Test stop server
-            response = await ac.delete("/users/alice/servers/")
-            assert response.status_code == 202
+    # Test list servers
+    response = await ac.get("/users/alice/servers")
+    assert response.status_code == 200
+    
+    # Test start server
+    response = await ac.post("/users/alice/servers/gpu")
+    assert response.status_code == 201
+    
+    # Test stop server
+    response = await ac.delete("/users/alice/servers/gpu")
+    assert response.status_code == 202
 
 
 @pytest.mark.asyncio
-async def test_group_operations(mock_client):
+async def test_bulk_server_listing(ac, mock_client):
+    """Test bulk server listing"""
+    
+    mock_client.list_all_user_servers.return_value = {"alice": {}, "bob": {"": {"ready": True}}}
+    
+    response = await ac.get("/users/servers:bulk?names=alice&names=bob")
+    assert response.status_code == 200
+    assert response.json()["bob"][""]["ready"] is True
+    mock_client.list_all_user_servers.assert_awaited_with(["alice", "bob"], return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_bulk_server_listing_unknown_user(ac):
+    """Test an unknown user gets an error entry without losing the others"""
+    
+    def handler(request):
+        if request.url.path.endswith("/ghost"):
+            return httpx.Response(404, json={"message": "Not found"})
+        return httpx.Response(200, json={"name": "a", "servers": {"": {"ready": True}}})
+    
+    client = HubClient(transport=httpx.MockTransport(handler))
+    app.state.hub_client = client
+    
+    response = await ac.get("/users/servers:bulk?names=a&names=ghost")
+    assert response.status_code == 207
+    body = response.json()
+    assert body["a"][""]["ready"] is True
+    assert body["ghost"]["status_code"] == 404
+    
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_group_operations(ac, mock_client):
     """Test group management operations"""
     
     mock_client.list_groups.return_value = [{"name": "scientists", "users": ["alice", "bob"]}]
     mock_client.create_group.return_value = {"name": "newgroup", "users": []}
     mock_client.add_user_to_group.return_value = {"status": "added"}
+    mock_client.add_users_to_group.return_value = {"name": "newgroup", "users": ["alice", "bob"]}
+    
+    # Test list groups
+    response = await ac.get("/groups")
+    assert response.status_code == 200
+    
+    # Test create group
+    response = await ac.post("/groups", json={"name": "newgroup", "users": []})
+    assert response.status_code == 201
     
-    with patch('jupyterhub_manager.api.main.get_client') as mock_get_client:
-        mock_get_client.return_value.__aenter__.return_value = mock_client
-        mock_get_client.return_value.__aexit__.return_value = None
-        
-        async with AsyncClient(app=app, base_url="http://test") as ac:
-            # Test list groups
-            response = await ac.get("/groups")
-            assert response.status_code == 200
-            
-            # Test create group
-            response = await ac.post("/groups", json={"name": "newgroup", "users": []})
-            assert response.status_code == 201
+    # Test bulk membership update
+    response = await ac.post("/groups/newgroup/users:bulk", json=["alice", "bob"])
+    assert response.status_code == 200
+    mock_client.add_users_to_group.assert_awaited_with("newgroup", ["alice", "bob"])
+    
+    # Test bulk membership removal
+    response = await ac.request("DELETE", "/groups/newgroup/users:bulk", json=["alice", "bob"])
+    assert response.status_code == 204
+    mock_client.remove_users_from_group.assert_awaited_with("newgroup", ["alice", "bob"])
 
 
 @pytest.mark.asyncio
-async def test_admin_operations(mock_client):
+async def test_admin_operations(ac, mock_client):
     """Test admin operations"""
     
     mock_client.get_proxy.return_value = {"routes": {}}
     mock_client.cull_servers.return_value = {"culled": 3}
     
-    with patch('jupyterhub_manager.api.main.get_client') as mock_get_client:
-        mock_get_client.return_value.__aenter__.return_value = mock_client
-        mock_get_client.return_value.__aexit__.return_value = None
-        
-        async with AsyncClient(app=app, base_url="http://test") as ac:
-            # Test proxy info
-            response = await ac.get("/admin/proxy")
-            assert response.status_code == 200
-            
-            # Test cull servers
-            response = await ac.post("/admin/cull")
-            assert response.status_code == 200
+    # Test proxy info
+    response = await ac.get("/admin/proxy")
+    assert response.status_code == 200
+    
+    # Test cull servers
+    response = await ac.post("/admin/cull")
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_client_dependency_override(ac):
+    """Test generated pass-through routes honour get_client overrides like the rest"""
+    
+    override = AsyncMock(spec=HubClient)
+    override.get_proxy.return_value = {"routes": {}}
+    override.get_user.return_value = {"name": "alice"}
+    app.dependency_overrides[get_client] = lambda: override
+    try:
+        assert (await ac.get("/admin/proxy")).json() == {"routes": {}}
+        assert (await ac.get("/users/alice")).json()["name"] == "alice"
+    finally:
+        app.dependency_overrides.clear()
+    override.get_proxy.assert_awaited_once()
 
 
 @pytest.mark.asyncio
-async def test_error_handling(mock_client):
+async def test_error_handling(ac, mock_client):
     """Test error handling"""
     
     mock_client.get_user.side_effect = Exception("User not found")
     
-    with patch('jupyterhub_manager.api.main.get_client') as mock_get_client:
-        mock_get_client.return_value.__aenter__.return_value = mock_client
-        mock_get_client.return_value.__aexit__.return_value = None
-        
-        async with AsyncClient(app=app, base_url="http://test") as ac:
-            # Test user not found
-            response = await ac.get("/users/nonexistent")
-            assert response.status_code == 404
+    # Test user not found
+    response = await ac.get("/users/nonexistent")
+    assert response.status_code == 404